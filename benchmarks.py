@@ -0,0 +1,265 @@
+"""Micro-benchmarks for the crawler's data structures.
+
+Run all benchmarks with `python benchmarks.py`, or pass benchmark names
+(e.g. `python benchmarks.py frontier`) to run a subset.
+"""
+import os
+import random
+import re
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from urllib.parse import urljoin
+
+import numpy as np
+import requests
+
+from crawl_graph import write_graph, load_graph
+from crawler import (Frontier, VisitedSet, FingerprintVisited, BloomVisited, extract_links,
+                     csr_from_edges, pagerank, LinkGraph, page_encoding)
+
+def bench_frontier(sizes=(10_000, 100_000, 1_000_000), pops=10_000):
+    """Compare dequeue cost of Frontier against list.pop(0) as the frontier grows."""
+    print(f"{'size':>10} {'Frontier ns/pop':>16} {'list.pop(0) ns/pop':>19}")
+    for size in sizes:
+        items = [(f'https://example.com/{i}.html', 1) for i in range(size)]
+
+        # Each URL is released after popping, as fetcher_thread does, so the
+        # host's concurrency cap never blocks; only pop() is timed.
+        frontier = Frontier(items)
+        elapsed = 0.0
+        for _ in range(pops):
+            start = time.perf_counter()
+            url, _ = frontier.pop()
+            elapsed += time.perf_counter() - start
+            frontier.release(url)
+        frontier_ns = elapsed / pops * 1e9
+
+        start_urls = list(items)
+        start = time.perf_counter()
+        for _ in range(pops):
+            start_urls.pop(0)
+        list_ns = (time.perf_counter() - start) / pops * 1e9
+
+        print(f"{size:>10} {frontier_ns:>16.0f} {list_ns:>19.0f}")
+
+def visited_store_bytes(store):
+    """Approximate memory held by a visited store, including URL strings."""
+    if isinstance(store, VisitedSet):
+        return sys.getsizeof(store.urls) + sum(sys.getsizeof(url) for url in store.urls)
+    if isinstance(store, FingerprintVisited):
+        return store.slots.buffer_info()[1] * store.slots.itemsize
+    return sum(len(bitmap) for bitmap, *_ in store.filters)
+
+def bench_visited(sizes=(1_000_000, 10_000_000)):
+    """Memory and add/lookup throughput of each visited store."""
+    print(f"{'store':>12} {'urls':>10} {'bytes/url':>10} {'adds/s':>10} {'hits/s':>10}")
+    for size in sizes:
+        for name, make in (('set', VisitedSet),
+                           ('fingerprint', FingerprintVisited),
+                           ('bloom', lambda: BloomVisited(capacity=size))):
+            store = make()
+            start = time.perf_counter()
+            for i in range(size):
+                store.add(f'https://example.com/section/{i % 997}/page-{i}.html')
+            adds = size / (time.perf_counter() - start)
+
+            lookups = min(size, 1_000_000)
+            start = time.perf_counter()
+            for i in range(lookups):
+                f'https://example.com/section/{i % 997}/page-{i}.html' in store
+            hits = lookups / (time.perf_counter() - start)
+
+            print(f"{name:>12} {size:>10} {visited_store_bytes(store) / size:>10.1f} {adds:>10.0f} {hits:>10.0f}")
+            del store
+
+def regex_extract_links(html, base_url):
+    """The original regex link extractor, kept as the baseline."""
+    url_pattern = re.compile(r'href=["\'](https?://[^\s"\']+|/[^\s"\']+|[\./\w\-]+\.html?)["\']')
+    urls = []
+    matches = url_pattern.findall(html)
+    for match in matches:
+        full_url = urljoin(base_url, match)
+        urls.append(full_url)
+
+    html_urls = [u for u in urls if re.match(r'https?://[^\s]+(?:\.html?)?$', u)]
+    return html_urls
+
+def synthetic_page(rng, links=150, paragraphs=40):
+    """A page shaped like a typical article: head, nav, scripts, body text and links."""
+    parts = ['<!DOCTYPE html><html><head><meta charset="utf-8"><title>Article</title>',
+             '<link rel="stylesheet" href="/static/site.css">',
+             '<script>window.dataLayer = []; function track(a) { return "<a href=x>" + a; }</script>',
+             '</head><body><nav>']
+    for i in range(links):
+        kind = rng.randrange(5)
+        if kind == 0:
+            href = f'https://example.com/section/{rng.randrange(1000)}/article-{i}.html'
+        elif kind == 1:
+            href = f'/topics/{rng.randrange(100)}?page={i}&amp;sort=new'
+        elif kind == 2:
+            href = f'related-{i}.html'
+        elif kind == 3:
+            href = f'//cdn.example.net/assets/{i}.html'
+        else:
+            href = f'https://other-{rng.randrange(50)}.org/{i}'
+        rel = ' rel="nofollow"' if rng.random() < 0.1 else ''
+        parts.append(f'<li><a class="nav-link" href="{href}"{rel}>Link <b>{i}</b> text</a></li>')
+        if i % 4 == 0:
+            parts.append('<p>' + 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * (paragraphs // 10) + '</p>')
+    parts.append('</nav><!-- footer <a href="/hidden">x</a> --></body></html>')
+    return ''.join(parts)
+
+def load_corpus(count=200):
+    """Pages from $BENCH_CORPUS (a directory of saved .html files), else synthetic pages."""
+    corpus_dir = os.environ.get('BENCH_CORPUS')
+    if corpus_dir:
+        pages = []
+        for name in sorted(os.listdir(corpus_dir)):
+            if name.endswith(('.html', '.htm')):
+                with open(os.path.join(corpus_dir, name), encoding='utf-8', errors='replace') as page:
+                    pages.append(page.read())
+        return pages
+    rng = random.Random(0)
+    return [synthetic_page(rng) for _ in range(count)]
+
+def bench_links(rounds=5):
+    """Pages/sec of extract_links against the original regex extractor."""
+    pages = load_corpus()
+    size = sum(len(page) for page in pages)
+    print(f"{len(pages)} pages, {size / len(pages) / 1024:.1f} KiB average")
+    for name, extract in (('regex', regex_extract_links), ('extract_links', extract_links)):
+        found = sum(len(extract(page, 'https://example.com/blog/post.html')) for page in pages)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for page in pages:
+                extract(page, 'https://example.com/blog/post.html')
+        elapsed = time.perf_counter() - start
+        print(f"{name:>14}: {len(pages) * rounds / elapsed:8.0f} pages/s, {found / len(pages):6.1f} links/page")
+
+def bench_decode(rounds=5):
+    """Decoding pages without a declared charset: response.text against page_encoding(), and raw-bytes extraction."""
+    pages = [page.replace('<meta charset="utf-8">', '').replace('Lorem ipsum', 'Lörem ipsüm').encode()
+             for page in load_corpus()]
+    base_url = 'https://example.com/blog/post.html'
+
+    def response_text(body):
+        response = requests.models.Response()
+        response._content = body
+        response.encoding = None  # what requests leaves when the headers carry no charset
+        return response.text
+
+    def decode(body):
+        return body.decode(page_encoding(None, body), errors='replace')
+
+    for name, run in (('response.text', response_text),
+                      ('page_encoding', decode),
+                      ('text + links', lambda body: extract_links(decode(body), base_url)),
+                      ('bytes + links', lambda body: extract_links(body, base_url, page_encoding(None, body)))):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for body in pages:
+                run(body)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>14}: {len(pages) * rounds / elapsed:8.0f} pages/s")
+
+def bench_pagerank(nodes=1_000_000, edges=10_000_000):
+    """CSR construction and PageRank time on a random graph with `edges` edges."""
+    rng = np.random.default_rng(0)
+    sources = rng.integers(0, nodes, edges)
+    # Skewed targets so a few pages collect most links, as on the web.
+    targets = (rng.pareto(1.2, edges) * 1000).astype(np.int64) % nodes
+
+    start = time.perf_counter()
+    indptr, indices = csr_from_edges(sources, targets, nodes)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ranks, iterations = pagerank(indptr, indices)
+    elapsed = time.perf_counter() - start
+    print(f"{nodes} nodes, {edges} edges: CSR build {build:.2f}s, "
+          f"PageRank {elapsed:.2f}s ({iterations} iterations, {elapsed / iterations * 1000:.0f} ms each)")
+
+    # Rewire 2% of the edges, as a recrawl would, and compare a cold start
+    # with IncrementalRanker's warm start from the previous ranks.
+    changed = rng.choice(edges, edges // 50, replace=False)
+    targets[changed] = rng.integers(0, nodes, len(changed))
+    indptr, indices = csr_from_edges(sources, targets, nodes)
+    for name, start_ranks in (('cold', None), ('warm', ranks)):
+        start = time.perf_counter()
+        _, iterations = pagerank(indptr, indices, start=start_ranks)
+        print(f"  after 2% edge change, {name} start: {time.perf_counter() - start:.2f}s ({iterations} iterations)")
+
+def bench_graph(pages=20_000, links=50):
+    """Memory of a dict of URL lists against LinkGraph for the same crawl."""
+    rng = random.Random(0)
+    site_pages = pages * 5
+
+    def outlinks():
+        # Fresh string objects per link, as extract_links produces them.
+        return [f'https://example.com/section/{n % 97}/article-{n}.html'
+                for n in (rng.randrange(site_pages) for _ in range(links))]
+
+    for name, graph in (('dict of lists', {}), ('LinkGraph', LinkGraph())):
+        rng.seed(0)
+        tracemalloc.start()
+        for page in range(pages):
+            graph[f'https://example.com/section/{page % 97}/article-{page}.html'] = outlinks()
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{name:>14}: {used / 2**20:7.1f} MiB for {pages} pages, {pages * links} edges")
+        del graph
+
+def bench_graph_file(nodes=1_000_000, edges=10_000_000, json_edges=1_000_000):
+    """Write and load times of the binary graph format, with crawl_paths.json for scale."""
+    rng = np.random.default_rng(0)
+    urls = [f'https://example.com/section/{n % 97}/article-{n}.html' for n in range(nodes)]
+    indices = rng.integers(0, nodes, edges).astype(np.uint32)
+    indptr = np.zeros(nodes + 1, dtype=np.int64)
+    indptr[1:] = np.sort(rng.integers(0, edges + 1, nodes))
+    indptr[-1] = edges
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'crawl_graph.bin')
+        start = time.perf_counter()
+        write_graph(path, urls, indptr, indices)
+        written = time.perf_counter() - start
+
+        start = time.perf_counter()
+        graph = load_graph(path)
+        loaded = time.perf_counter() - start
+        start = time.perf_counter()
+        for n in range(0, nodes, nodes // 1000):
+            graph.id(urls[n])
+        lookup = (time.perf_counter() - start) / 1000
+        graph.close()
+        print(f"binary, {edges} edges: {os.path.getsize(path) / 2**20:.0f} MiB, write {written:.2f}s, "
+              f"load {loaded * 1000:.2f} ms, id() lookup {lookup * 1e6:.1f} us")
+
+        json_path = os.path.join(directory, 'crawl_paths.json')
+        json_nodes = nodes * json_edges // edges
+        crawl = {urls[n]: [urls[t] for t in indices[n * 10:n * 10 + 10] % json_nodes] for n in range(json_nodes)}
+        with open(json_path, 'w') as json_file:
+            json.dump(crawl, json_file, indent=4)
+        start = time.perf_counter()
+        with open(json_path) as json_file:
+            json.load(json_file)
+        print(f"json, {json_edges} edges: {os.path.getsize(json_path) / 2**20:.0f} MiB, "
+              f"load {time.perf_counter() - start:.2f}s")
+
+BENCHMARKS = {
+    'frontier': bench_frontier,
+    'visited': bench_visited,
+    'links': bench_links,
+    'decode': bench_decode,
+    'pagerank': bench_pagerank,
+    'graph': bench_graph,
+    'graph_file': bench_graph_file,
+}
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        print(f"== {name} ==")
+        BENCHMARKS[name]()
@@ -0,0 +1,182 @@
+"""Binary, memory-mappable crawl graph files.
+
+A graph file holds the URL string table, an index of URLs in sorted order
+and the CSR edge arrays, each 8-byte aligned, so load_graph() can mmap the
+file and answer queries without parsing or copying it:
+
+    header      magic, version, node/edge/page counts, section offsets
+    offsets     (nodes + 1) x u64  byte offsets of each URL in `strings`
+    order       nodes x u32        node IDs sorted by URL, for lookups
+    pages       nodes x u8         1 if the node is a fetched page
+    indptr      (nodes + 1) x u64  CSR row pointers
+    indices     edges x u32        CSR column indices (target node IDs)
+    strings     UTF-8 URL bytes
+
+Usage: python crawl_graph.py from-json crawl_paths.json crawl_graph.bin
+       python crawl_graph.py to-json crawl_graph.bin crawl_paths.json
+"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+
+MAGIC = b'SKGRAPH1'
+VERSION = 1
+HEADER = struct.Struct('<8sIIQQQ6Q')
+
+def align(offset):
+    return (offset + 7) & ~7
+
+def pack(values, typecode):
+    """Raw bytes of `values` as an array of `typecode`, skipping Python ints for matching buffers."""
+    try:
+        view = memoryview(values)
+    except TypeError:
+        return array(typecode, values).tobytes()
+    if view.format[-1:] in 'bBhHiIlLqQ?' and view.itemsize == array(typecode).itemsize:
+        return view.tobytes()
+    return array(typecode, values).tobytes()
+
+def write_graph(path, urls, indptr, indices, pages=None):
+    """Write a graph file.
+
+    `urls[i]` is the URL of node i, `indptr`/`indices` are its CSR outlinks
+    (any buffer or sequence of integers, e.g. numpy arrays) and `pages`
+    flags the nodes that were fetched (all nodes with outlinks if omitted).
+    """
+    if sys.byteorder != 'little':
+        raise ValueError("graph files are little-endian only")
+    node_count = len(urls)
+    encoded = [url.encode() for url in urls]
+    offsets = array('Q', [0])
+    position = 0
+    for url in encoded:
+        position += len(url)
+        offsets.append(position)
+    order = array('I', sorted(range(node_count), key=encoded.__getitem__))
+    indptr = pack(indptr, 'Q')
+    indices = pack(indices, 'I')
+    if pages is None:
+        row_starts = memoryview(indptr).cast('Q')
+        pages = [row_starts[i + 1] > row_starts[i] for i in range(node_count)]
+    pages = pack(pages, 'B')
+    edge_count = len(indices) // 4
+
+    sections = [offsets.tobytes(), order.tobytes(), pages, indptr, indices, b''.join(encoded)]
+    starts = []
+    position = align(HEADER.size)
+    for section in sections:
+        starts.append(position)
+        position = align(position + len(section))
+
+    with open(path, 'wb') as graph_file:
+        graph_file.write(HEADER.pack(MAGIC, VERSION, 0, node_count, edge_count, sum(pages), *starts))
+        for start, section in zip(starts, sections):
+            graph_file.write(b'\0' * (start - graph_file.tell()))
+            graph_file.write(section)
+
+class MappedGraph(Mapping):
+    """A graph file mapped into memory.
+
+    The `offsets`, `order`, `pages`, `indptr` and `indices` attributes are
+    memoryviews over the mapping; pass them to numpy.frombuffer for
+    zero-copy array access. As a Mapping it reads like crawl_paths.json:
+    graph[url] is the list of a fetched page's outlinks.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as graph_file:
+            self.map = mmap.mmap(graph_file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.map)
+        magic, version, _, self.node_count, self.edge_count, self.page_count, *starts = HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} crawl graph file")
+        nodes, edges = self.node_count, self.edge_count
+        self.offsets = view[starts[0]:starts[0] + 8 * (nodes + 1)].cast('Q')
+        self.order = view[starts[1]:starts[1] + 4 * nodes].cast('I')
+        self.pages = view[starts[2]:starts[2] + nodes]
+        self.indptr = view[starts[3]:starts[3] + 8 * (nodes + 1)].cast('Q')
+        self.indices = view[starts[4]:starts[4] + 4 * edges].cast('I')
+        self.strings = view[starts[5]:starts[5] + self.offsets[nodes]]
+
+    def url_bytes(self, node):
+        return self.strings[self.offsets[node]:self.offsets[node + 1]].tobytes()
+
+    def url(self, node):
+        return str(self.strings[self.offsets[node]:self.offsets[node + 1]], 'utf-8')
+
+    def id(self, url):
+        """Node ID of `url` by binary search over the sorted index, or None."""
+        key = url.encode()
+        low, high = 0, self.node_count
+        while low < high:
+            middle = (low + high) // 2
+            node = self.order[middle]
+            if self.url_bytes(node) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.node_count:
+            node = self.order[low]
+            if self.url_bytes(node) == key:
+                return node
+        return None
+
+    def outlinks(self, node):
+        """Target node IDs of `node`, as a memoryview slice."""
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def __getitem__(self, url):
+        node = self.id(url)
+        if node is None or not self.pages[node]:
+            raise KeyError(url)
+        return [self.url(target) for target in self.outlinks(node)]
+
+    def __iter__(self):
+        return (self.url(node) for node in range(self.node_count) if self.pages[node])
+
+    def __len__(self):
+        return self.page_count
+
+    def close(self):
+        for name in ('offsets', 'order', 'pages', 'indptr', 'indices', 'strings'):
+            getattr(self, name).release()
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def load_graph(path):
+    """Memory-map a graph file written by write_graph()."""
+    return MappedGraph(path)
+
+def json_to_graph(json_path, graph_path):
+    """Convert a crawl_paths.json file (url -> list of outlinks) to a graph file."""
+    with open(json_path) as json_file:
+        crawl = json.load(json_file)
+    ids = {url: node for node, url in enumerate(crawl)}
+    indptr = array('Q', [0])
+    indices = array('I')
+    for outlinks in crawl.values():
+        for target in outlinks:
+            indices.append(ids.setdefault(target, len(ids)))
+        indptr.append(len(indices))
+    indptr.extend([len(indices)] * (len(ids) - len(crawl)))
+    pages = [True] * len(crawl) + [False] * (len(ids) - len(crawl))
+    write_graph(graph_path, list(ids), indptr, indices, pages)
+
+def graph_to_json(graph_path, json_path):
+    """Write a graph file back out as crawl_paths.json."""
+    with load_graph(graph_path) as graph, open(json_path, 'w') as json_file:
+        json.dump(dict(graph.items()), json_file, indent=4)
+
+if __name__ == "__main__":
+    commands = {'from-json': json_to_graph, 'to-json': graph_to_json}
+    if len(sys.argv) != 4 or sys.argv[1] not in commands:
+        sys.exit(__doc__)
+    commands[sys.argv[1]](sys.argv[2], sys.argv[3])
@@ -1,13 +1,33 @@
+import asyncio
+import aiohttp
 import requests
-from urllib.parse import urljoin, urlparse, urlunparse
+from requests.adapters import HTTPAdapter
+import urllib3
+from urllib.parse import urljoin, urlparse, urlunparse, urlsplit, urlunsplit
 import re
-from collections import defaultdict
+import codecs
+from html import unescape
+import heapq
+import hashlib
+import math
+import random
+from array import array
+from collections import defaultdict, deque, OrderedDict, namedtuple
+from collections.abc import Mapping
 from tqdm import tqdm
+import numpy as np
+from crawl_graph import write_graph
 import time
+from email.utils import parsedate_to_datetime
 import json
+import gzip
+import sqlite3
+import tempfile
 from urllib.robotparser import RobotFileParser
-from threading import Thread, Lock
-from queue import Queue
+from threading import Thread, Lock, Condition, Event, local
+from queue import Queue, Empty, Full
+from concurrent.futures import Future, ProcessPoolExecutor
+import multiprocessing
 import os
 import logging
 
@@ -19,16 +39,906 @@ logging.basicConfig(
 )
 
 # Thread-safe queues
-html_queue = Queue()
-result_lock = Lock()
 visited_lock = Lock()
 
 # Shared results and state
-robots_txt = {}
-visited = set()
-result_dict = {}
 vote_counts = defaultdict(float)
 
+# Per-thread keep-alive sessions. A fetcher thread has one request in
+# flight at a time, so one kept-alive connection per host is all it uses.
+session_pool_hosts = 100
+thread_state = local()
+sessions = []
+sessions_lock = Lock()
+
+def get_session():
+    """Return this thread's pooled session, creating it on first use."""
+    session = getattr(thread_state, 'session', None)
+    if session is None:
+        session = requests.Session()
+        session.headers['User-Agent'] = 'Seekora'
+        adapter = HTTPAdapter(pool_connections=session_pool_hosts, pool_maxsize=1)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        thread_state.session = session
+        with sessions_lock:
+            sessions.append(session)
+    return session
+
+def close_sessions():
+    """Close every session opened by the fetcher threads."""
+    with sessions_lock:
+        for session in sessions:
+            session.close()
+        sessions.clear()
+
+class Frontier:
+    """Per-host queues of (url, depth) pairs, handed out politely.
+
+    Each root URL gets its own FIFO. A host is only handed out again once
+    `min_interval` (or its robots.txt Crawl-delay) has passed since its last
+    fetch started, and while fewer than `max_per_host` of its URLs are being
+    fetched; until rules_loaded() is called for a host, only one of its URLs
+    is fetched at a time, so its Crawl-delay is known before any burst.
+    pop() returns a URL from whichever host becomes ready first, so a slow
+    or throttling host never holds up the others.
+
+    Like queue.Queue, every pushed URL counts as outstanding work until
+    task_done() is called for it, after its page has been processed and its
+    outlinks pushed. The crawl is finished once nothing is outstanding.
+
+    A URL whose fetch failed transiently goes back in with retry(), which
+    holds it aside for an exponential backoff and keeps it outstanding.
+
+    Response times reported to record_latency() are averaged per host. Once
+    a host has `min_latency_samples` samples, averaging `slow_latency`
+    seconds or more demotes it to one fetch at a time, spaced by its
+    latency, and averaging `quarantine_latency` or more holds it back for
+    `quarantine_time` seconds.
+    """
+
+    def __init__(self, items=(), min_interval=0.0, max_per_host=10, retries=3, retry_delay=5.0,
+                 max_retry_delay=300.0, breaker_threshold=5, breaker_cooldown=60.0,
+                 slow_latency=5.0, quarantine_latency=20.0, quarantine_time=300.0, latency_weight=0.3,
+                 min_latency_samples=5):
+        self.min_interval = min_interval
+        self.max_per_host = max_per_host
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.slow_latency = slow_latency
+        self.quarantine_latency = quarantine_latency
+        self.quarantine_time = quarantine_time
+        self.latency_weight = latency_weight
+        self.min_latency_samples = min_latency_samples
+        self.hosts = {}
+        self.ready = []
+        self.scheduled = set()
+        self.next_fetch = {}
+        self.active = {}
+        self.crawl_delays = {}
+        self.rules_loaded_for = set()
+        self.delayed = []
+        self.attempts = {}
+        self.failures = {}
+        self.latency = {}
+        self.latency_samples = {}
+        self.size = 0
+        self.outstanding = 0
+        self.lock = Lock()
+        self.changed = Condition(self.lock)
+        for url, depth in items:
+            self.push(url, depth)
+
+    def push(self, url, depth):
+        root = rootURL(url)
+        with self.lock:
+            self.outstanding += 1
+            self._enqueue(root, url, depth)
+
+    def pop(self, timeout=None):
+        """Return the next (url, depth) pair from a ready host.
+
+        Waits up to `timeout` seconds (forever if None) for a host to become
+        ready or for new work to arrive. Returns None on timeout or once the
+        crawl is finished.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.lock:
+            while self.outstanding:
+                now = time.monotonic()
+                while self.delayed and self.delayed[0][0] <= now:
+                    _, url, depth = heapq.heappop(self.delayed)
+                    self._enqueue(rootURL(url), url, depth)
+                self._replenish()
+                wait = None
+                if self.ready:
+                    ready_at, root = self.ready[0]
+                    if ready_at <= now:
+                        heapq.heappop(self.ready)
+                        self.scheduled.discard(root)
+                        if self.next_fetch.get(root, 0.0) > now:
+                            self._schedule(root)
+                            continue
+                        return self._take(root, now)
+                    wait = ready_at - now
+                if self.delayed:
+                    retry_at = self.delayed[0][0] - now
+                    wait = retry_at if wait is None else min(wait, retry_at)
+                if deadline is not None:
+                    if deadline <= now:
+                        return None
+                    wait = deadline - now if wait is None else min(wait, deadline - now)
+                self.changed.wait(wait)
+        return None
+
+    def release(self, url):
+        """Release the host slot taken by a URL returned from pop()."""
+        root = rootURL(url)
+        with self.lock:
+            self.active[root] -= 1
+            if not self.active[root]:
+                del self.active[root]
+            self._schedule(root)
+
+    def retry(self, url, depth, retry_after=0.0):
+        """Queue a URL whose fetch failed transiently again, after a backoff.
+
+        The delay doubles with each attempt from `retry_delay`, with jitter,
+        and is at least `retry_after` (the server's Retry-After), capped at
+        `max_retry_delay`. Failures also count against the host: from
+        `breaker_threshold` failures in a row its circuit breaker opens and
+        the whole host is held back for `breaker_cooldown` seconds, doubling
+        with every further failure until a fetch succeeds. Returns False if
+        the URL has used up its `retries`; it is then still outstanding and
+        the caller must call task_done() for it.
+        """
+        root = rootURL(url)
+        with self.lock:
+            now = time.monotonic()
+            failures = self.failures[root] = self.failures.get(root, 0) + 1
+            if failures >= self.breaker_threshold:
+                cooldown = min(self.max_retry_delay, self.breaker_cooldown * 2 ** (failures - self.breaker_threshold))
+                self.next_fetch[root] = max(self.next_fetch.get(root, 0.0), now + cooldown)
+                logging.warning(f"{failures} failures in a row on {root}; pausing it for {cooldown:.0f} seconds")
+
+            attempt = self.attempts.pop(url, 0) + 1
+            if attempt > self.retries:
+                return False
+            self.attempts[url] = attempt
+            backoff = self.retry_delay * 2 ** (attempt - 1)
+            delay = min(self.max_retry_delay, max(retry_after, random.uniform(backoff / 2, backoff)))
+            heapq.heappush(self.delayed, (now + delay, url, depth))
+            self.changed.notify()
+            return True
+
+    def record_latency(self, url, seconds):
+        """Fold the response time of a request for `url` into its host's moving average."""
+        root = rootURL(url)
+        with self.lock:
+            latency = self.latency.get(root)
+            latency = seconds if latency is None else latency + self.latency_weight * (seconds - latency)
+            self.latency[root] = latency
+            self.latency_samples[root] = self.latency_samples.get(root, 0) + 1
+            if self._slow(root, self.quarantine_latency):
+                self.next_fetch[root] = max(self.next_fetch.get(root, 0.0), time.monotonic() + self.quarantine_time)
+                logging.warning(f"{root} averages {latency:.1f}s per fetch; quarantining it for {self.quarantine_time:.0f} seconds")
+
+    def record_success(self, url):
+        """Clear the retry count of `url` and close its host's circuit breaker."""
+        with self.lock:
+            self.attempts.pop(url, None)
+            self.failures.pop(rootURL(url), None)
+
+    def task_done(self):
+        """Mark a popped URL as fully handled; wakes every waiter when the crawl ends."""
+        with self.lock:
+            self.outstanding -= 1
+            if not self.outstanding:
+                self.changed.notify_all()
+
+    @property
+    def finished(self):
+        return not self.outstanding
+
+    def rules_loaded(self, root, crawl_delay=None):
+        """Lift the one-at-a-time limit on a new host once its robots.txt is loaded.
+
+        A Crawl-delay longer than min_interval is applied from now on.
+        """
+        with self.lock:
+            if root in self.rules_loaded_for:
+                return
+            self.rules_loaded_for.add(root)
+            if crawl_delay:
+                self.crawl_delays[root] = float(crawl_delay)
+                self.next_fetch[root] = max(self.next_fetch.get(root, 0.0), time.monotonic() + float(crawl_delay))
+            self._schedule(root)
+
+    def throttle(self, root, delay):
+        """Hold back every URL on `root` for at least `delay` seconds."""
+        with self.lock:
+            self.next_fetch[root] = max(self.next_fetch.get(root, 0.0), time.monotonic() + delay)
+
+    def wait_time(self):
+        """Seconds until the next host or retry is ready, or None if nothing is schedulable."""
+        with self.lock:
+            due = [queue[0][0] for queue in (self.ready, self.delayed) if queue]
+            if not due:
+                return None
+            return max(0.0, min(due) - time.monotonic())
+
+    def _enqueue(self, root, url, depth):
+        queue = self.hosts.get(root)
+        if queue is None:
+            queue = self.hosts[root] = deque()
+        queue.append((url, depth))
+        self.size += 1
+        self._schedule(root)
+
+    def _replenish(self):
+        """Hook for subclasses to refill the in-memory queues; called with the lock held."""
+
+    def _take(self, root, now):
+        queue = self.hosts[root]
+        item = queue.popleft()
+        self.size -= 1
+        if not queue:
+            del self.hosts[root]
+        self.active[root] = self.active.get(root, 0) + 1
+        interval = max(self.min_interval, self.crawl_delays.get(root, 0.0))
+        if self._slow(root, self.slow_latency):
+            interval = max(interval, self.latency[root])
+        self.next_fetch[root] = max(self.next_fetch.get(root, 0.0), now + interval)
+        self._schedule(root)
+        return item
+
+    def _slow(self, root, threshold):
+        return (self.latency_samples.get(root, 0) >= self.min_latency_samples
+                and self.latency[root] >= threshold)
+
+    def _schedule(self, root):
+        if root not in self.rules_loaded_for or self._slow(root, self.slow_latency):
+            limit = 1
+        else:
+            limit = self.max_per_host
+        if root in self.scheduled or root not in self.hosts or self.active.get(root, 0) >= limit:
+            return
+        heapq.heappush(self.ready, (self.next_fetch.get(root, 0.0), root))
+        self.scheduled.add(root)
+        self.changed.notify()
+
+    def __len__(self):
+        return self.size + len(self.delayed)
+
+class DiskFrontier(Frontier):
+    """Frontier that keeps at most `max_in_memory` URLs in RAM and spills the rest to disk.
+
+    Once the in-memory queues are full, pushes are appended to numbered
+    segment files of up to `segment_size` URLs (at most half of
+    `max_in_memory`) in `directory`, a temporary directory by default.
+    Whenever the in-memory queues drop below half of `max_in_memory`, the
+    oldest segment is read back in one sequential pass and deleted, so URLs
+    still come out in roughly FIFO order while memory stays bounded.
+    """
+
+    def __init__(self, items=(), min_interval=0.0, max_per_host=10,
+                 max_in_memory=100_000, segment_size=50_000, directory=None, **options):
+        self.max_in_memory = max_in_memory
+        self.refill_below = max(1, max_in_memory // 2)
+        self.segment_size = max(1, min(segment_size, max_in_memory // 2))
+        self.temporary = directory is None
+        self.directory = directory or tempfile.mkdtemp(prefix='frontier-')
+        os.makedirs(self.directory, exist_ok=True)
+        self.segments = deque()
+        self.segment_file = None
+        self.segment_count = 0
+        self.spilled = 0
+        self.next_segment = 0
+        super().__init__(items, min_interval, max_per_host, **options)
+
+    def push(self, url, depth):
+        with self.lock:
+            self.outstanding += 1
+            if self.spilled or self.size >= self.max_in_memory:
+                self._spill(url, depth)
+            else:
+                self._enqueue(rootURL(url), url, depth)
+
+    def _spill(self, url, depth):
+        if self.segment_file is None or self.segment_count >= self.segment_size:
+            self._close_segment()
+            path = os.path.join(self.directory, f'{self.next_segment:08d}.seg')
+            self.next_segment += 1
+            self.segments.append(path)
+            self.segment_file = open(path, 'w', encoding='utf-8')
+        self.segment_file.write(f'{depth}\t{url}\n')
+        self.segment_count += 1
+        self.spilled += 1
+
+    def _close_segment(self):
+        if self.segment_file is not None:
+            self.segment_file.close()
+            self.segment_file = None
+            self.segment_count = 0
+
+    def _replenish(self):
+        if not self.spilled or self.size >= self.refill_below:
+            return
+        path = self.segments.popleft()
+        if not self.segments:
+            self._close_segment()
+        with open(path, encoding='utf-8') as segment:
+            for line in segment:
+                depth, url = line.rstrip('\n').split('\t', 1)
+                self._enqueue(rootURL(url), url, int(depth))
+                self.spilled -= 1
+        os.remove(path)
+
+    def _take(self, root, now):
+        item = super()._take(root, now)
+        self._replenish()
+        return item
+
+    def close(self):
+        """Delete any segment files left on disk, and the directory if it was a temporary one."""
+        with self.lock:
+            self._close_segment()
+            for path in self.segments:
+                os.remove(path)
+            self.segments.clear()
+            self.spilled = 0
+            if self.temporary:
+                os.rmdir(self.directory)
+
+    def __len__(self):
+        return super().__len__() + self.spilled
+
+# search_all_urls() replaces this with a frontier for its crawl; the default
+# lets crawl_site() be called on its own.
+frontier = Frontier()
+
+class RobotsCache:
+    """LRU cache of parsed robots.txt rules per root URL, with a TTL.
+
+    Fetches are single-flight: concurrent misses on the same root wait for
+    the first caller's fetch instead of requesting robots.txt again.
+    Failed fetches are cached as allow-all rules for `negative_ttl` seconds.
+    """
+
+    def __init__(self, max_hosts=10000, ttl=3600, negative_ttl=300):
+        self.max_hosts = max_hosts
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.entries = OrderedDict()
+        self.loading = {}
+        self.tasks = {}
+        self.lock = Lock()
+
+    def get(self, root):
+        """Return the cached RobotFileParser for `root`, or None if missing or expired."""
+        with self.lock:
+            return self._lookup(root)
+
+    def put(self, root, robot_parser, ttl=None):
+        with self.lock:
+            self.entries[root] = (robot_parser, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self.entries.move_to_end(root)
+            while len(self.entries) > self.max_hosts:
+                self.entries.popitem(last=False)
+
+    def put_failure(self, root):
+        """Cache an allow-all entry for a root whose robots.txt could not be fetched."""
+        robot_parser = RobotFileParser()
+        robot_parser.parse([])
+        self.put(root, robot_parser, self.negative_ttl)
+        return robot_parser
+
+    def load(self, root, fetch):
+        """Return the rules for `root`, calling fetch() once across all waiting threads."""
+        with self.lock:
+            robot_parser = self._lookup(root)
+            if robot_parser is not None:
+                return robot_parser
+            future = self.loading.get(root)
+            leader = future is None
+            if leader:
+                future = self.loading[root] = Future()
+
+        if leader:
+            try:
+                future.set_result(fetch())
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self.lock:
+                    del self.loading[root]
+        return future.result()
+
+    async def async_load(self, root, fetch):
+        """Coroutine version of load(); fetch() must return an awaitable."""
+        robot_parser = self.get(root)
+        if robot_parser is not None:
+            return robot_parser
+        task = self.tasks.get(root)
+        if task is None:
+            task = self.tasks[root] = asyncio.ensure_future(fetch())
+            task.add_done_callback(lambda _: self.tasks.pop(root, None))
+        return await asyncio.shield(task)
+
+    def _lookup(self, root):
+        entry = self.entries.get(root)
+        if entry is None:
+            return None
+        robot_parser, expires = entry
+        if expires < time.monotonic():
+            del self.entries[root]
+            return None
+        self.entries.move_to_end(root)
+        return robot_parser
+
+    def __len__(self):
+        return len(self.entries)
+
+robots_txt = RobotsCache()
+
+class VisitedSet:
+    """Exact visited store keeping every URL string. The default."""
+
+    def __init__(self):
+        self.urls = set()
+
+    def add(self, url):
+        """Record `url`; return True if it had not been seen before."""
+        if url in self.urls:
+            return False
+        self.urls.add(url)
+        return True
+
+    def __contains__(self, url):
+        return url in self.urls
+
+    def __len__(self):
+        return len(self.urls)
+
+def url_fingerprint(url):
+    """64-bit fingerprint of a URL; never 0, which marks an empty slot."""
+    return int.from_bytes(hashlib.blake2b(url.encode(), digest_size=8).digest(), 'little') or 1
+
+class FingerprintVisited:
+    """Exact visited store of 64-bit URL fingerprints in an open-addressing table.
+
+    Costs 8 bytes per slot at a load factor of at most 3/4, against 100+
+    bytes per URL for a set of strings. Two URLs colliding on all 64 bits
+    would be treated as one, which is negligible below billions of URLs.
+    """
+
+    def __init__(self, capacity=1 << 16):
+        size = 1 << max(4, math.ceil(math.log2(capacity / 0.75)))
+        self.slots = array('Q', bytes(8 * size))
+        self.mask = size - 1
+        self.count = 0
+
+    def add(self, url):
+        """Record `url`; return True if it had not been seen before."""
+        fingerprint = url_fingerprint(url)
+        slots, mask = self.slots, self.mask
+        i = fingerprint & mask
+        while slots[i]:
+            if slots[i] == fingerprint:
+                return False
+            i = (i + 1) & mask
+        slots[i] = fingerprint
+        self.count += 1
+        if self.count * 4 > len(slots) * 3:
+            self._grow()
+        return True
+
+    def __contains__(self, url):
+        fingerprint = url_fingerprint(url)
+        slots, mask = self.slots, self.mask
+        i = fingerprint & mask
+        while slots[i]:
+            if slots[i] == fingerprint:
+                return True
+            i = (i + 1) & mask
+        return False
+
+    def _grow(self):
+        old = self.slots
+        self.slots = slots = array('Q', bytes(16 * len(old)))
+        self.mask = mask = len(slots) - 1
+        for fingerprint in old:
+            if fingerprint:
+                i = fingerprint & mask
+                while slots[i]:
+                    i = (i + 1) & mask
+                slots[i] = fingerprint
+
+    def __len__(self):
+        return self.count
+
+class BloomVisited:
+    """Probabilistic visited store backed by scalable Bloom filters.
+
+    A URL is reported as visited wrongly with probability at most about
+    `error_rate`, so a small fraction of pages may be skipped. Once a filter
+    holds `capacity` URLs a new one twice as large, with half the error
+    rate, is added, which keeps the overall rate bounded.
+    """
+
+    def __init__(self, capacity=1_000_000, error_rate=1e-4):
+        self.filters = []
+        self.count = 0
+        self._add_filter(capacity, error_rate / 2)
+
+    def _add_filter(self, capacity, error_rate):
+        bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        hashes = max(1, round(bits / capacity * math.log(2)))
+        self.filters.append([bytearray((bits + 7) // 8), bits, hashes, capacity, error_rate, 0])
+
+    def _contains(self, digest):
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for bitmap, bits, hashes, *_ in self.filters:
+            for i in range(hashes):
+                p = (h1 + i * h2) % bits
+                if not bitmap[p >> 3] & (1 << (p & 7)):
+                    break
+            else:
+                return True
+        return False
+
+    def __contains__(self, url):
+        return self._contains(hashlib.blake2b(url.encode(), digest_size=16).digest())
+
+    def add(self, url):
+        """Record `url`; return True if it had (probably) not been seen before."""
+        digest = hashlib.blake2b(url.encode(), digest_size=16).digest()
+        if self._contains(digest):
+            return False
+        current = self.filters[-1]
+        if current[5] >= current[3]:
+            self._add_filter(current[3] * 2, current[4] / 2)
+            current = self.filters[-1]
+        bitmap, bits, hashes = current[0], current[1], current[2]
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(hashes):
+            p = (h1 + i * h2) % bits
+            bitmap[p >> 3] |= 1 << (p & 7)
+        current[5] += 1
+        self.count += 1
+        return True
+
+    def __len__(self):
+        return self.count
+
+VISITED_STORES = {
+    'set': VisitedSet,
+    'fingerprint': FingerprintVisited,
+    'bloom': BloomVisited,
+}
+
+visited = VisitedSet()
+
+# URL canonicalization
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+TRACKING_PARAMS = ['utm_*', 'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid', '_ga', '_hsenc', '_hsmi']
+
+def compile_param_filter(names):
+    """Compile query parameter names (with * wildcards) into one matcher for 'name=value' pairs."""
+    names = [re.escape(name).replace(r'\*', '[^=]*') for name in names]
+    return re.compile(r'(?:%s)(?:=|$)' % '|'.join(names)).match if names else None
+
+tracking_param_filter = compile_param_filter(TRACKING_PARAMS)
+host_param_filters = {}
+# The uncompiled rules, for configuring worker processes the same way.
+canonicalization_rules = (list(TRACKING_PARAMS), {})
+
+def configure_canonicalization(tracking_params=None, host_params=None):
+    """Replace the tracking parameters stripped everywhere and the per-host extras.
+
+    `host_params` maps a lowercase host name to parameter names that are only
+    noise on that host (e.g. session ids). All rules are compiled up front.
+    """
+    global tracking_param_filter, host_param_filters, canonicalization_rules
+    tracking_rules, host_rules = canonicalization_rules
+    if tracking_params is not None:
+        tracking_param_filter = compile_param_filter(tracking_params)
+        tracking_rules = list(tracking_params)
+    if host_params is not None:
+        host_param_filters = {host: compile_param_filter(names) for host, names in host_params.items()}
+        host_rules = {host: list(names) for host, names in host_params.items()}
+    canonicalization_rules = (tracking_rules, host_rules)
+
+def remove_dot_segments(path):
+    if '/.' not in path:
+        return path
+    output = []
+    segments = path.split('/')
+    for segment in segments:
+        if segment == '..':
+            if len(output) > 1:
+                output.pop()
+        elif segment != '.':
+            output.append(segment)
+    if segments[-1] in ('.', '..'):
+        output.append('')
+    return '/'.join(output)
+
+def canonicalize_url(url):
+    """Normalize a URL so that equivalent spellings dedupe to one frontier entry.
+
+    Lowercases scheme and host, drops the fragment and default port, resolves
+    dot segments, strips tracking parameters and sorts the rest of the query.
+    """
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    host = parts.hostname or ''
+    netloc = f'[{host}]' if ':' in host else host
+    if port is not None and DEFAULT_PORTS.get(scheme) != port:
+        netloc = f'{netloc}:{port}'
+    if '@' in parts.netloc:
+        netloc = parts.netloc.rpartition('@')[0] + '@' + netloc
+
+    query = parts.query
+    if query:
+        host_filter = host_param_filters.get(host)
+        params = [param for param in query.split('&')
+                  if param
+                  and not (tracking_param_filter and tracking_param_filter(param))
+                  and not (host_filter and host_filter(param))]
+        params.sort()
+        query = '&'.join(params)
+
+    return urlunsplit((scheme, netloc, remove_dot_segments(parts.path) or '/', query, ''))
+
+# `validators` and `outlinks` are only set when the fetch cache is on;
+# `outlinks` is the cached link list of a page that has not changed.
+# `html` is str, or bytes in `encoding` when raw_pages is set.
+# `retry_after` is set for transient failures: seconds the server asked
+# for, or 0. `size` is the length in bytes of the body as downloaded.
+FetchResult = namedtuple('FetchResult', 'html status validators outlinks encoding retry_after size',
+                         defaults=(None, None, 'utf-8', None, 0))
+Page = namedtuple('Page', 'url html depth status elapsed validators outlinks encoding size',
+                  defaults=(None, None, 'utf-8', 0))
+Validators = namedtuple('Validators', 'etag last_modified content_hash')
+
+def page_size(item):
+    """Bytes held by an html_queue entry (None entries are free).
+
+    Counted from the downloaded body: len() of a decoded page is its length
+    in characters, which can be a fraction of the memory it takes.
+    """
+    return item.size if item else 0
+
+class PageQueue(Queue):
+    """Queue of fetched Pages, bounded by count and by total size.
+
+    put() blocks while the queue holds `maxsize` pages or while adding the
+    page would take it past `max_bytes`. A single page larger than
+    `max_bytes` is still let through once the queue is empty.
+    """
+
+    def __init__(self, maxsize=0, max_bytes=0):
+        super().__init__(maxsize)
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.peak_bytes = 0
+
+    def put(self, item, block=True, timeout=None):
+        size = page_size(item)
+        with self.not_full:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while ((0 < self.maxsize <= self._qsize())
+                   or (self.max_bytes and self.bytes and self.bytes + size > self.max_bytes)):
+                if not block:
+                    raise Full
+                if deadline is None:
+                    self.not_full.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Full
+                    self.not_full.wait(remaining)
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def _put(self, item):
+        self.queue.append(item)
+        self.bytes += page_size(item)
+        self.peak_bytes = max(self.peak_bytes, self.bytes)
+
+    def _get(self):
+        item = self.queue.popleft()
+        self.bytes -= page_size(item)
+        return item
+
+    def stats(self):
+        """Current depth and byte totals, for progress reporting."""
+        with self.mutex:
+            return {'pages': self._qsize(), 'bytes': self.bytes, 'peak_bytes': self.peak_bytes}
+
+html_queue = PageQueue()
+
+class ResultWriter:
+    """Appends one JSON line per processed page to a file, in buffered batches.
+
+    Lines reach the file every `batch_size` records and on close(), so a
+    crash loses at most one batch. Paths ending in .gz are gzip-compressed
+    unless `compress` says otherwise.
+    """
+
+    def __init__(self, path, batch_size=100, compress=None):
+        if compress is None:
+            compress = path.endswith('.gz')
+        self.file = gzip.open(path, 'at', encoding='utf-8') if compress else open(path, 'a', encoding='utf-8')
+        self.batch_size = batch_size
+        self.lines = []
+        self.records = 0
+        self.lock = Lock()
+
+    def write(self, record):
+        line = json.dumps(record, separators=(',', ':'))
+        with self.lock:
+            self.lines.append(line)
+            if len(self.lines) >= self.batch_size:
+                self._flush()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        with self.lock:
+            self._flush()
+            self.file.close()
+
+    def _flush(self):
+        if self.lines:
+            self.file.write('\n'.join(self.lines) + '\n')
+            self.records += len(self.lines)
+            self.lines.clear()
+        self.file.flush()
+
+result_writer = None
+
+class Checkpoint(ResultWriter):
+    """Log-structured crawl state, for resuming an interrupted crawl.
+
+    The directory holds crawl.json (start URL and depth) and pages.jsonl,
+    the same per-page records as ResultWriter writes. Every queued URL is
+    the seed or an outlink of a logged page, so replaying the log rebuilds
+    the visited set, the link graph and the unfetched frontier. The log is
+    append-only and flushed in batches and at least every `interval`
+    seconds by a background thread, so checkpointing never pauses the crawl.
+    """
+
+    def __init__(self, directory, start_url, max_depth, interval=10.0, batch_size=1000):
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'crawl.json'), 'w') as meta_file:
+            json.dump({'start_url': start_url, 'max_depth': max_depth}, meta_file)
+        super().__init__(os.path.join(directory, 'pages.jsonl'), batch_size, compress=False)
+        self.stopped = Event()
+        self.flusher = Thread(target=self.flush_periodically, args=(interval,), daemon=True)
+        self.flusher.start()
+
+    def flush_periodically(self, interval):
+        while not self.stopped.wait(interval):
+            self.flush()
+
+    def close(self):
+        self.stopped.set()
+        self.flusher.join()
+        super().close()
+
+checkpoint = None
+
+def restore_checkpoint(directory, max_depth):
+    """Replay a checkpoint into result_dict and visited; returns the (url, depth) pairs still to fetch.
+
+    Returns None if the directory holds no crawl log yet.
+    """
+    pages_path = os.path.join(directory, 'pages.jsonl')
+    if not os.path.exists(pages_path):
+        return None
+    queued = {}
+    with open(pages_path, encoding='utf-8') as pages_file:
+        for line in pages_file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A torn last line from a crash; the page is simply fetched again.
+                continue
+            url, depth = record['url'], record['depth']
+            result_dict.add_page(url, record['outlinks'])
+            visited.add(url)
+            if depth + 1 <= max_depth:
+                for new_url in record['outlinks']:
+                    visited.add(new_url)
+                    if queued.get(new_url, max_depth + 1) > depth + 1:
+                        queued[new_url] = depth + 1
+    logging.info(f"Restored {len(result_dict)} pages from checkpoint {directory}")
+    return [(url, depth) for url, depth in queued.items() if url not in result_dict]
+
+class FetchCache:
+    """Persistent per-URL validators and outlinks from earlier crawls, in SQLite.
+
+    crawl_site() sends the stored ETag and Last-Modified as If-None-Match and
+    If-Modified-Since; on a 304, or a 200 whose body hashes the same as last
+    time, the stored outlinks are reused and the page is never parsed.
+    Writes are committed every `batch_size` pages and on close().
+    """
+
+    def __init__(self, path, batch_size=100):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.batch_size = batch_size
+        self.pending = 0
+        self.lock = Lock()
+        with self.lock:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, etag TEXT, '
+                                    'last_modified TEXT, content_hash BLOB, outlinks TEXT)')
+            self.connection.commit()
+
+    def get(self, url):
+        """(Validators, outlinks) stored for `url`, or None."""
+        with self.lock:
+            row = self.connection.execute('SELECT etag, last_modified, content_hash, outlinks FROM pages '
+                                          'WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return None
+        return Validators(*row[:3]), json.loads(row[3])
+
+    def put(self, url, validators, outlinks):
+        with self.lock:
+            self.connection.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)',
+                                    (url, *validators, json.dumps(outlinks)))
+            self.pending += 1
+            if self.pending >= self.batch_size:
+                self.connection.commit()
+                self.pending = 0
+
+    def close(self):
+        with self.lock:
+            self.connection.commit()
+            self.connection.close()
+
+fetch_cache = None
+
+def conditional_headers(cached):
+    """If-None-Match / If-Modified-Since headers for a fetch_cache entry."""
+    headers = {}
+    if cached is not None:
+        validators = cached[0]
+        if validators.etag:
+            headers['If-None-Match'] = validators.etag
+        if validators.last_modified:
+            headers['If-Modified-Since'] = validators.last_modified
+    return headers
+
+def cache_lookup(status, headers, body, cached):
+    """Validators of a response and, if the page is unchanged since `cached`, its cached outlinks."""
+    if status == 304:
+        validators, outlinks = cached
+        return Validators(headers.get('ETag') or validators.etag,
+                          headers.get('Last-Modified') or validators.last_modified,
+                          validators.content_hash), outlinks
+    validators = Validators(headers.get('ETag'), headers.get('Last-Modified'),
+                            hashlib.blake2b(body, digest_size=16).digest())
+    if cached is not None and cached[0].content_hash == validators.content_hash:
+        return validators, cached[1]
+    return validators, None
+
 def rootURL(url):
     parsed = urlparse(url)
     root = urlunparse((parsed.scheme, parsed.netloc, '/', '', '', ''))
@@ -38,121 +948,886 @@ def get_robots_txt(url):
     root_url = rootURL(url)
     robots_url = root_url + 'robots.txt'
     try:
-        headers = {'User-Agent': 'Seekora'}
-        response = requests.get(robots_url, headers=headers)
+        response = get_session().get(robots_url, timeout=fetch_timeouts)
         response.raise_for_status()
-        robots_txt[root_url] = response.text
-        return response.text
+        return store_robots_txt(root_url, response.text)
     except requests.RequestException as e:
         logging.error(f"Error fetching robots.txt from {robots_url}: {e}")
-        return None
+        return robots_txt.put_failure(root_url)
 
-def is_allowed_to_crawl(robots_txt_content, url):
+def store_robots_txt(root_url, robots_txt_content):
+    """Parse robots.txt once and cache the rules."""
     robot_parser = RobotFileParser()
     robot_parser.parse(robots_txt_content.splitlines())
+    robots_txt.put(root_url, robot_parser)
+    return robot_parser
+
+def is_allowed_to_crawl(robot_parser, url):
     return robot_parser.can_fetch('*', url)
 
-def crawl_site(url, retries=3, delay=5):
-    root_url = rootURL(url)
-    if root_url in robots_txt:
-        robots = robots_txt[root_url]
+# Media types worth parsing for links; a response without a Content-Type is
+# fetched too, since plenty of servers omit it for HTML.
+HTML_TYPES = frozenset(['text/html', 'application/xhtml+xml'])
+page_byte_limit = 10 * 2**20
+# (connect, read) timeouts for every request, and the most a page body may
+# take in total, so a server trickling bytes can't hold a fetcher forever.
+fetch_timeouts = (10.0, 30.0)
+page_deadline = 60.0
+read_chunk_size = 64 * 1024
+
+def is_html_type(content_type):
+    return not content_type or content_type.split(';', 1)[0].strip().lower() in HTML_TYPES
+
+def check_headers(url, headers):
+    """False if the Content-Type shows a response isn't HTML, so its body is never read."""
+    if not is_html_type(headers.get('Content-Type')):
+        logging.info(f"Skipping {url}: Content-Type {headers.get('Content-Type')}")
+        return False
+    length = headers.get('Content-Length', '')
+    if length.isdigit() and int(length) > page_byte_limit:
+        logging.warning(f"{url} is {length} bytes; reading only the first {page_byte_limit}")
+    return True
+
+def iter_body(response):
+    """Chunks of a streamed response as they arrive.
+
+    iter_content() waits for each chunk to fill up, which a server sending a
+    few bytes at a time can stretch out indefinitely.
+    """
+    raw = response.raw
+    if not hasattr(raw, 'read1'):  # urllib3 < 2.3
+        return response.iter_content(read_chunk_size)
+    return iter(lambda: raw.read1(read_chunk_size, decode_content=True), b'')
+
+def read_body(response, deadline):
+    """Read a streamed requests response, stopping after page_byte_limit bytes.
+
+    Raises requests.Timeout once time.monotonic() passes `deadline`.
+    """
+    chunks = []
+    size = 0
+    try:
+        for chunk in iter_body(response):
+            if time.monotonic() > deadline:
+                raise requests.Timeout(f"{response.url} took longer than {page_deadline} seconds")
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= page_byte_limit:
+                break
+    except urllib3.exceptions.ReadTimeoutError as e:
+        raise requests.Timeout(e)
+    except urllib3.exceptions.HTTPError as e:
+        raise requests.ConnectionError(e)
+    return b''.join(chunks)[:page_byte_limit]
+
+async def async_read_body(response):
+    """Read an aiohttp response, stopping after page_byte_limit bytes."""
+    chunks = []
+    size = 0
+    async for chunk in response.content.iter_chunked(read_chunk_size):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= page_byte_limit:
+            break
+    return b''.join(chunks)[:page_byte_limit]
+
+header_charset_pattern = re.compile(r'''charset\s*=\s*["']?([\w:.-]+)''', re.IGNORECASE)
+meta_charset_pattern = re.compile(rb'''<meta[^>]+?charset\s*=\s*["']?\s*([\w:.-]+)''', re.IGNORECASE)
+charset_sniff_bytes = 4096
+raw_pages = False
+
+def page_encoding(content_type, body):
+    """Codec name for a page body.
+
+    Taken from a byte order mark, the Content-Type charset or a <meta>
+    charset in the first charset_sniff_bytes bytes, in that order; UTF-8
+    if none is declared or the declared one is unknown. Unlike
+    response.text this never runs charset detection over the whole body.
+    """
+    if body.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if body.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    match = header_charset_pattern.search(content_type or '')
+    if match:
+        charset = match.group(1)
     else:
-        robots = get_robots_txt(url)
-    if robots and not is_allowed_to_crawl(robots, url):
+        match = meta_charset_pattern.search(body, 0, charset_sniff_bytes)
+        charset = match.group(1).decode('ascii') if match else 'utf-8'
+    try:
+        return codecs.lookup(charset).name
+    except LookupError:
+        return 'utf-8'
+
+def page_html(body, encoding):
+    """The body as text, or as-is when raw_pages is set and the charset is ASCII-compatible."""
+    if raw_pages and not encoding.startswith(('utf-16', 'utf-32')):
+        return body
+    return body.decode(encoding, errors='replace')
+
+def page_result(status, headers, body, cached):
+    """FetchResult for a page body; with the fetch cache on, an unchanged page carries its cached outlinks instead."""
+    encoding = page_encoding(headers.get('Content-Type'), body)
+    if fetch_cache is None:
+        return FetchResult(page_html(body, encoding), status, encoding=encoding, size=len(body))
+    validators, outlinks = cache_lookup(status, headers, body, cached)
+    html = page_html(body, encoding) if outlinks is None else None
+    return FetchResult(html, status, validators, outlinks, encoding, size=len(body) if html is not None else 0)
+
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+# Errors worth retrying; anything else (a redirect loop, a malformed URL)
+# fails the same way every time.
+TRANSIENT_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+ASYNC_TRANSIENT_ERRORS = (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError)
+
+def retry_after_seconds(value):
+    """Seconds asked for by a Retry-After header (delta-seconds or HTTP-date), or 0."""
+    if not value:
+        return 0.0
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return 0.0
+
+def retry_result(url, status, headers):
+    """FetchResult asking for a retry of a 429 or 5xx response.
+
+    A 429 or a Retry-After also throttles the host, for no longer than the
+    frontier's max_retry_delay so one header can't stall the whole crawl.
+    """
+    retry_after = min(retry_after_seconds(headers.get('Retry-After')), frontier.max_retry_delay)
+    logging.warning(f"Received {status} for {url}; will retry")
+    if status == 429 or retry_after:
+        frontier.throttle(rootURL(url), retry_after or frontier.retry_delay)
+    return FetchResult(None, status, retry_after=retry_after)
+
+def schedule_retry(result, url, depth):
+    """Hand a transient failure back to the frontier; True if `url` will be fetched again."""
+    if result is None or result.retry_after is None:
+        frontier.record_success(url)
+        return False
+    return frontier.retry(url, depth, result.retry_after)
+
+def crawl_site(url):
+    """Fetch `url` if robots.txt allows it; returns a FetchResult or None on failure.
+
+    The body is streamed: non-HTML responses are dropped once their headers
+    arrive and at most page_byte_limit bytes of a page are read. A 429,
+    5xx or network error is not retried here; the FetchResult carries a
+    `retry_after` and the caller hands the URL back to the frontier.
+    """
+    root_url = rootURL(url)
+    robots = robots_txt.load(root_url, lambda: get_robots_txt(url))
+    frontier.rules_loaded(root_url, robots.crawl_delay('*'))
+    if not is_allowed_to_crawl(robots, url):
         return None
 
-    for attempt in range(retries):
-        try:
-            headers = {'User-Agent': 'Seekora'}
-            response = requests.get(url, headers=headers)
-            if response.status_code == 429:
-                logging.warning(f"Received 429 for {url}. Retrying in {delay} seconds...")
-                time.sleep(delay)
-                continue
+    cached = fetch_cache.get(url) if fetch_cache is not None else None
+    started = time.monotonic()
+    deadline = started + page_deadline
+    try:
+        with get_session().get(url, headers=conditional_headers(cached), stream=True, timeout=fetch_timeouts) as response:
+            if response.status_code == 304 and cached is not None:
+                frontier.record_latency(url, time.monotonic() - started)
+                return FetchResult(None, 304, *cache_lookup(304, response.headers, None, cached))
+            if response.status_code in RETRY_STATUSES:
+                return retry_result(url, response.status_code, response.headers)
 
             response.raise_for_status()
-            return response.text
-        except requests.RequestException as e:
-            logging.error(f"Error fetching the URL {url}: {e}")
-            time.sleep(delay)
-    return None
-
-def extract_links(html, base_url):
-    """Extract links from HTML content."""
-    url_pattern = re.compile(r'href=["\'](https?://[^\s"\']+|/[^\s"\']+|[\./\w\-]+\.html?)["\']')
-    urls = []
-    matches = url_pattern.findall(html)
-    for match in matches:
-        full_url = urljoin(base_url, match)
-        urls.append(full_url)
-
-    html_urls = [u for u in urls if re.match(r'https?://[^\s]+(?:\.html?)?$', u)]
-    return html_urls
+            if not check_headers(url, response.headers):
+                return None
+            body = read_body(response, deadline)
+        frontier.record_latency(url, time.monotonic() - started)
+        return page_result(response.status_code, response.headers, body, cached)
+    except TRANSIENT_ERRORS as e:
+        logging.error(f"Error fetching the URL {url}: {e}")
+        return FetchResult(None, None, retry_after=0.0)
+    except requests.RequestException as e:
+        logging.error(f"Error fetching the URL {url}: {e}")
+        return None
+
+class Link(namedtuple('Link', 'url text rel')):
+    """A hyperlink found in a page; `rel` is a frozenset of lowercase rel tokens."""
+    __slots__ = ()
+
+    @property
+    def nofollow(self):
+        return 'nofollow' in self.rel
+
+# Tokens the link extractor cares about: <a>/<area>/<base> start tags, </a>,
+# and comments/scripts/styles, which are skipped whole.
+link_token_pattern = re.compile(
+    r'<(a|area|base)(?=[\s>/])([^>]*)>|</a\s*>|<!--.*?-->|<(script|style)\b.*?</\3\s*>',
+    re.IGNORECASE | re.DOTALL)
+link_token_bytes_pattern = re.compile(link_token_pattern.pattern.encode(), re.IGNORECASE | re.DOTALL)
+attribute_pattern = re.compile(r'''([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))?''')
+inner_tag_pattern = re.compile(r'<[^>]*>')
+whitespace_pattern = re.compile(r'\s+')
+relative_path_pattern = re.compile(r'[\w\-~%][^:?#]*$')
+no_rel = frozenset()
+
+def link_bases(base_url):
+    """Scheme, origin and directory of a base URL, for resolving relative hrefs."""
+    base = urlsplit(base_url)
+    origin = f'{base.scheme}://{base.netloc}'
+    directory = base.path[:base.path.rfind('/') + 1] or '/'
+    return base.scheme, origin, origin + directory
+
+def parse_attributes(text):
+    attributes = {}
+    for name, double, single, bare in attribute_pattern.findall(text):
+        attributes.setdefault(name.lower(), double or single or bare)
+    return attributes
+
+def iter_links(html, base_url, encoding='utf-8'):
+    """Yield a Link for every <a>/<area> href in `html`, honouring <base href>.
+
+    `html` may also be bytes in an ASCII-compatible `encoding`; then only
+    the link tags and texts are decoded.
+    """
+    scheme, origin, directory = link_bases(base_url)
+    open_link = None
+    raw = isinstance(html, bytes)
+    slash = b'/' if raw else '/'
+
+    for match in (link_token_bytes_pattern if raw else link_token_pattern).finditer(html):
+        tag = match.group(1)
+        if tag is None:
+            if open_link is not None and match.group(0)[1:2] == slash:
+                href, rel, start = open_link
+                text = html[start:match.start()]
+                if raw:
+                    text = text.decode(encoding, errors='replace')
+                if '<' in text:
+                    text = inner_tag_pattern.sub(' ', text)
+                if '&' in text:
+                    text = unescape(text)
+                text = whitespace_pattern.sub(' ', text).strip()
+                yield Link(href, text, rel)
+                open_link = None
+            continue
+
+        attributes = match.group(2)
+        if raw:
+            tag = tag.decode('ascii')
+            attributes = attributes.decode(encoding, errors='replace')
+        attributes = parse_attributes(attributes)
+        href = attributes.get('href', '')
+        if '&' in href:
+            href = unescape(href)
+        href = href.strip()
+        # Blank and fragment-only hrefs point back at the page itself.
+        if not href or href[0] == '#':
+            continue
+        tag = tag.lower()
+        if tag == 'base':
+            base_url = urljoin(base_url, href)
+            scheme, origin, directory = link_bases(base_url)
+            continue
+
+        # Fast paths for the common href shapes; dot segments are resolved
+        # later by canonicalize_url.
+        if href.startswith(('http://', 'https://')):
+            url = href
+        elif href[0] == '/':
+            url = scheme + ':' + href if href[1:2] == '/' else origin + href
+        elif relative_path_pattern.match(href):
+            url = directory + href
+        else:
+            url = urljoin(base_url, href)
+            if not url[:8].lower().startswith(('http://', 'https://')):
+                continue
+        rel = attributes.get('rel')
+        rel = frozenset(rel.lower().split()) if rel else no_rel
+
+        if open_link is not None:
+            yield Link(open_link[0], '', open_link[1])
+            open_link = None
+        if tag == 'a':
+            open_link = (url, rel, match.end())
+        else:
+            yield Link(url, attributes.get('alt', ''), rel)
+
+    if open_link is not None:
+        yield Link(open_link[0], '', open_link[1])
+
+def extract_links(html, base_url, encoding='utf-8'):
+    """Extract followable (not rel=nofollow) links from HTML content."""
+    return [link.url for link in iter_links(html, base_url, encoding) if not link.nofollow]
+
+def claim_next_url(progress_bar, timeout=None):
+    """Pop the next URL to fetch, waiting for one unless the crawl is finished.
+
+    URLs are deduplicated and depth-checked when they are pushed, so every
+    popped URL is fetched. The caller must call frontier.release() once it
+    is fetched and frontier.task_done() once it is fully handled. Returns
+    None when the crawl is finished (or `timeout` expires).
+    """
+    item = frontier.pop(timeout)
+    if item is not None:
+        progress_bar.update(1)
+    return item
+
+def has_content(result):
+    """True if a FetchResult has a page to process: fresh HTML or cached outlinks."""
+    return result is not None and (bool(result.html) or result.outlinks is not None)
 
 def fetcher_thread(max_depth, progress_bar):
     """Fetch HTML documents and store them in a queue."""
     while True:
-        with visited_lock:
-            if not start_urls:
-                break
-            url, depth = start_urls.pop(0)
-            if url in visited or depth > max_depth:
-                continue
-            visited.add(url)
-            progress_bar.update(1)
+        item = claim_next_url(progress_bar)
+        if item is None:
+            break
+        url, depth = item
 
-        html = crawl_site(url)
-        if html:
-            html_queue.put((url, html, depth))
+        result = None
+        retrying = False
+        started = time.monotonic()
+        try:
+            result = crawl_site(url)
+            retrying = schedule_retry(result, url, depth)
+        finally:
+            frontier.release(url)
+            if not (retrying or has_content(result)):
+                frontier.task_done()
+        if has_content(result):
+            html_queue.put(Page(url, result.html, depth, result.status, time.monotonic() - started,
+                                result.validators, result.outlinks, result.encoding, result.size))
+            stats = html_queue.stats()
+            progress_bar.set_postfix_str(f"queued={stats['pages']} ({stats['bytes'] / 2**20:.1f} MiB)", refresh=False)
 
-def processor_thread(max_depth, progress_bar):
-    """Process HTML documents from the queue and extract links."""
-    while True:
+def page_links(html, url, encoding='utf-8'):
+    """Canonical followable links of one page."""
+    return [canonicalize_url(found_url) for found_url in extract_links(html, url, encoding)]
+
+def extract_links_batch(pages):
+    """page_links() over a batch of (url, html, encoding) tuples; runs in the process pool.
+
+    A page that fails to parse gets no links rather than failing the batch.
+    """
+    results = []
+    for url, html, encoding in pages:
         try:
-            url, html, depth = html_queue.get(timeout=1)
-        except:
-            if not start_urls:
+            results.append(page_links(html, url, encoding))
+        except Exception:
+            logging.exception(f"Error extracting links from {url}")
+            results.append([])
+    return results
+
+def record_links(page, found_urls, max_depth):
+    """Record a page's outlinks and queue the ones not seen before.
+
+    Every distinct outlink goes into result_dict, which makes it the crawl's
+    link graph. URLs are marked visited as they are queued, so each URL
+    enters the frontier at most once.
+    """
+    url, depth = page.url, page.depth
+    found_urls = list(dict.fromkeys(found_urls))
+    result_dict.add_page(url, found_urls)
+    if fetch_cache is not None and page.validators is not None:
+        fetch_cache.put(url, page.validators, found_urls)
+    if result_writer is not None or checkpoint is not None:
+        record = {'url': url, 'depth': depth, 'status': page.status,
+                  'fetch_ms': round(page.elapsed * 1000, 1), 'outlinks': found_urls}
+        if result_writer is not None:
+            result_writer.write(record)
+        if checkpoint is not None:
+            checkpoint.write(record)
+    if rank_interval and len(result_dict) - ranker.ranked_pages >= rank_interval:
+        ranker.refresh(vote_counts)
+    if depth + 1 > max_depth:
+        return
+
+    with visited_lock:
+        for new_url in found_urls:
+            if visited.add(new_url):
+                frontier.push(new_url, depth + 1)
+
+def process_page(page, max_depth):
+    """Extract links from a fetched page and queue the unvisited ones."""
+    if page.outlinks is not None:
+        record_links(page, page.outlinks, max_depth)
+    else:
+        record_links(page, page_links(page.html, page.url, page.encoding), max_depth)
+
+def processor_thread(max_depth, progress_bar, executor=None, batch_size=16):
+    """Process HTML documents from the queue and extract links.
+
+    With an `executor` (a ProcessPoolExecutor) pages are taken off the queue
+    in batches of up to `batch_size` and parsed in the pool. Exits on a None
+    entry, which search_all_urls queues once the crawl is finished.
+    """
+    while True:
+        item = html_queue.get()
+        if item is None:
+            html_queue.task_done()
+            break
+
+        batch = [item]
+        while executor is not None and len(batch) < batch_size:
+            try:
+                item = html_queue.get_nowait()
+            except Empty:
                 break
-            continue
+            if item is None:
+                html_queue.put(None)
+                html_queue.task_done()
+                break
+            batch.append(item)
+
+        try:
+            if executor is None:
+                process_page(batch[0], max_depth)
+            else:
+                parse = [(page.url, page.html, page.encoding) for page in batch if page.outlinks is None]
+                results = iter(executor.submit(extract_links_batch, parse).result() if parse else ())
+                for page in batch:
+                    record_links(page, page.outlinks if page.outlinks is not None else next(results), max_depth)
+        except Exception:
+            logging.exception(f"Error processing {[page.url for page in batch]}")
+        finally:
+            for _ in batch:
+                frontier.task_done()
+                html_queue.task_done()
+
+class LinkGraph(Mapping):
+    """Crawl link graph with URLs interned to dense integer IDs.
+
+    Each URL string is stored once; edges live in append-only array('I')
+    buffers, one contiguous run per page, and are compacted to CSR arrays by
+    to_csr(). As a Mapping it reads like the old result_dict: graph[url] is
+    the list of a fetched page's outlinks and iteration yields fetched pages.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.urls = []
+        self.sources = array('I')
+        self.targets = array('I')
+        self.edge_start = array('q')
+        self.edge_end = array('q')
+        self.page_count = 0
+        self.dead_edges = 0
+        self.lock = Lock()
+
+    def intern(self, url):
+        url_id = self.ids.get(url)
+        if url_id is None:
+            url_id = self.ids[url] = len(self.urls)
+            self.urls.append(url)
+            self.edge_start.append(-1)
+            self.edge_end.append(-1)
+        return url_id
+
+    def add_page(self, url, outlinks):
+        """Record (or replace) the outlinks of a fetched page."""
+        with self.lock:
+            source = self.intern(url)
+            # Intern every target before touching the edge arrays, so a
+            # failure can't leave sources and targets out of step.
+            targets = array('I', [self.intern(target) for target in outlinks])
+            if self.edge_start[source] < 0:
+                self.page_count += 1
+            else:
+                self.dead_edges += self.edge_end[source] - self.edge_start[source]
+            self.edge_start[source] = len(self.targets)
+            self.sources.extend(array('I', [source]) * len(targets))
+            self.targets.extend(targets)
+            self.edge_end[source] = len(self.targets)
+
+    __setitem__ = add_page
+
+    def edge_arrays(self):
+        """Copies of the live (sources, targets) edge arrays as int64 numpy arrays."""
+        # Everything is copied under the lock: a numpy view still exporting
+        # an array's buffer would make the next append() raise BufferError.
+        with self.lock:
+            sources = np.array(self.sources, dtype=np.int64)
+            targets = np.array(self.targets, dtype=np.int64)
+            if self.dead_edges:
+                starts = np.array(self.edge_start, dtype=np.int64)
+                ends = np.array(self.edge_end, dtype=np.int64)
+                positions = np.arange(len(targets))
+                live = (positions >= starts[sources]) & (positions < ends[sources])
+                sources, targets = sources[live], targets[live]
+        return sources, targets
+
+    def to_csr(self):
+        """Compact the graph into CSR (indptr, indices) arrays over all interned URLs."""
+        sources, targets = self.edge_arrays()
+        return csr_from_edges(sources, targets, len(self.urls))
+
+    def to_dict(self):
+        return {url: self[url] for url in self}
+
+    def save(self, path):
+        """Write the graph as a memory-mappable crawl_graph file."""
+        indptr, indices = self.to_csr()
+        node_count = len(indptr) - 1
+        with self.lock:
+            pages = np.array(self.edge_start[:node_count], dtype=np.int64) >= 0
+        write_graph(path, self.urls[:node_count], indptr, indices.astype(np.uint32), pages)
+
+    def __getitem__(self, url):
+        url_id = self.ids.get(url)
+        if url_id is None or self.edge_start[url_id] < 0:
+            raise KeyError(url)
+        urls, targets = self.urls, self.targets
+        return [urls[target] for target in targets[self.edge_start[url_id]:self.edge_end[url_id]]]
+
+    def __contains__(self, url):
+        url_id = self.ids.get(url)
+        return url_id is not None and self.edge_start[url_id] >= 0
+
+    def __iter__(self):
+        edge_start = self.edge_start
+        return (url for url_id, url in enumerate(self.urls[:len(edge_start)]) if edge_start[url_id] >= 0)
+
+    def __len__(self):
+        return self.page_count
+
+result_dict = LinkGraph()
+
+def csr_from_edges(sources, targets, node_count):
+    """Build CSR (indptr, indices) arrays of a directed graph from parallel edge arrays."""
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    order = np.argsort(sources, kind='stable')
+    indptr = np.zeros(node_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=node_count), out=indptr[1:])
+    return indptr, targets[order]
+
+def build_link_matrix(graph):
+    """Intern the URLs of `graph` (url -> outlinks) to integer IDs and return (urls, indptr, indices)."""
+    if isinstance(graph, LinkGraph):
+        return graph.urls, *graph.to_csr()
+    ids = {}
+    sources = []
+    targets = []
+    for url, outlinks in graph.items():
+        source = ids.setdefault(url, len(ids))
+        for target in outlinks:
+            sources.append(source)
+            targets.append(ids.setdefault(target, len(ids)))
+    indptr, indices = csr_from_edges(sources, targets, len(ids))
+    return list(ids), indptr, indices
+
+def pagerank(indptr, indices, damping=0.85, tol=1e-6, max_iter=100, start=None):
+    """PageRank by power iteration over a CSR adjacency matrix.
+
+    Dangling pages spread their rank evenly over all pages. Iterates until
+    the L1 change drops below `tol`, starting from `start` if given (it is
+    normalised) or from the uniform vector. Returns (ranks, iterations).
+    """
+    node_count = len(indptr) - 1
+    if not node_count:
+        return np.zeros(0), 0
+    out_degree = np.diff(indptr)
+    sources = np.repeat(np.arange(node_count), out_degree)
+    dangling = out_degree == 0
+    inverse_degree = np.zeros(node_count)
+    inverse_degree[~dangling] = 1.0 / out_degree[~dangling]
+
+    if start is None:
+        ranks = np.full(node_count, 1.0 / node_count)
+    else:
+        ranks = np.asarray(start, dtype=np.float64) / np.sum(start)
+    for iteration in range(1, max_iter + 1):
+        shares = (ranks * inverse_degree)[sources]
+        new_ranks = np.bincount(indices, weights=shares, minlength=node_count)
+        new_ranks += ranks[dangling].sum() / node_count
+        new_ranks = damping * new_ranks + (1.0 - damping) / node_count
+        change = np.abs(new_ranks - ranks).sum()
+        ranks = new_ranks
+        if change < tol:
+            break
+    return ranks, iteration
+
+def rank_pages(graph, **options):
+    """PageRank score of every URL in the link graph `graph`."""
+    urls, indptr, indices = build_link_matrix(graph)
+    ranks, _ = pagerank(indptr, indices, **options)
+    return dict(zip(urls, ranks.tolist()))
 
-        found_urls = extract_links(html, url)
-        with result_lock:
-            if url not in result_dict:
-                result_dict[url] = []
+class IncrementalRanker:
+    """PageRank over a LinkGraph, kept fresh as the crawl graph grows.
 
-            for new_url in found_urls:
-                with visited_lock:
-                    if new_url not in visited and depth + 1 <= max_depth:
-                        start_urls.append((new_url, depth + 1))
-                        result_dict[url].append(new_url)
+    The graph's URL IDs are stable, so update() warm-starts from the
+    previous rank vector (or from the scores of an earlier crawl passed as
+    `previous`). When only a small share of the graph has changed it
+    converges in a few iterations rather than from scratch.
+    """
 
-        html_queue.task_done()
+    def __init__(self, graph, previous=None, damping=0.85, tol=1e-6):
+        self.graph = graph
+        self.previous = previous or {}
+        self.damping = damping
+        self.tol = tol
+        self.ranks = np.zeros(0)
+        self.ranked_pages = 0
+        self.updating = Lock()
 
-def search_all_urls(start_url, max_depth):
-    """Search all URLs using multithreaded fetchers and a single processor."""
-    global result_dict, vote_counts, start_urls
-    result_dict = {}
+    def update(self, votes=None):
+        """Recompute ranks and write them into `votes`, after any refresh in progress."""
+        with self.updating:
+            self._update(votes)
+
+    def refresh(self, votes=None):
+        """Run update() on a background thread; skipped if an update is already running.
+
+        Building the CSR arrays and iterating PageRank takes seconds on a
+        large graph, too long to hold up a processor thread or the event loop.
+        """
+        if not self.updating.acquire(blocking=False):
+            return
+        self.ranked_pages = len(self.graph)
+        Thread(target=self._refresh, args=(votes,), daemon=True).start()
+
+    def _refresh(self, votes):
+        try:
+            self._update(votes)
+        except Exception:
+            logging.exception("Error ranking pages")
+        finally:
+            self.updating.release()
+
+    def _update(self, votes):
+        self.ranked_pages = len(self.graph)
+        urls = self.graph.urls
+        indptr, indices = self.graph.to_csr()
+        node_count = len(indptr) - 1
+
+        start = np.full(node_count, 1.0 / max(node_count, 1))
+        known = len(self.ranks)
+        start[:known] = self.ranks
+        if self.previous:
+            for url_id in range(known, node_count):
+                start[url_id] = self.previous.get(urls[url_id], start[url_id])
+        self.ranks, iterations = pagerank(indptr, indices, self.damping, self.tol, start=start)
+        logging.info(f"Ranked {node_count} pages in {iterations} iterations")
+        if votes is not None:
+            votes.update(zip(urls[:node_count], self.ranks.tolist()))
+
+ranker = IncrementalRanker(result_dict)
+rank_interval = 1000
+
+async def async_get_robots_txt(session, url):
+    root_url = rootURL(url)
+    robots_url = root_url + 'robots.txt'
+    try:
+        async with session.get(robots_url) as response:
+            response.raise_for_status()
+            text = await response.text(errors='replace')
+            return store_robots_txt(root_url, text)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logging.error(f"Error fetching robots.txt from {robots_url}: {e}")
+        return robots_txt.put_failure(root_url)
+
+async def async_crawl_site(session, url):
+    """Coroutine version of crawl_site() using an aiohttp session."""
+    root_url = rootURL(url)
+    robots = await robots_txt.async_load(root_url, lambda: async_get_robots_txt(session, url))
+    frontier.rules_loaded(root_url, robots.crawl_delay('*'))
+    if not is_allowed_to_crawl(robots, url):
+        return None
+
+    cached = fetch_cache.get(url) if fetch_cache is not None else None
+    started = time.monotonic()
+    try:
+        async with session.get(url, headers=conditional_headers(cached)) as response:
+            if response.status == 304 and cached is not None:
+                frontier.record_latency(url, time.monotonic() - started)
+                return FetchResult(None, 304, *cache_lookup(304, response.headers, None, cached))
+            if response.status in RETRY_STATUSES:
+                return retry_result(url, response.status, response.headers)
+
+            response.raise_for_status()
+            if not check_headers(url, response.headers):
+                return None
+            body = await async_read_body(response)
+        frontier.record_latency(url, time.monotonic() - started)
+        return page_result(response.status, response.headers, body, cached)
+    except ASYNC_TRANSIENT_ERRORS as e:
+        logging.error(f"Error fetching the URL {url}: {e}")
+        return FetchResult(None, None, retry_after=0.0)
+    except aiohttp.ClientError as e:
+        logging.error(f"Error fetching the URL {url}: {e}")
+        return None
+
+async def async_search(max_depth, progress_bar, concurrency, executor=None):
+    """Fetch and process pages with `concurrency` coroutines on one event loop."""
+    loop = asyncio.get_running_loop()
+    work_ready = asyncio.Condition()
+    # The frontier already caps fetches per host; a lower connector limit
+    # would only make coroutines queue inside session.get().
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=frontier.max_per_host)
+    timeout = aiohttp.ClientTimeout(total=page_deadline, sock_connect=fetch_timeouts[0], sock_read=fetch_timeouts[1])
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers={'User-Agent': 'Seekora'}) as session:
+        async def worker():
+            while True:
+                async with work_ready:
+                    while True:
+                        item = claim_next_url(progress_bar, timeout=0)
+                        if item or frontier.finished:
+                            break
+                        try:
+                            await asyncio.wait_for(work_ready.wait(), frontier.wait_time())
+                        except asyncio.TimeoutError:
+                            pass
+                    if item is None:
+                        return
+
+                url, depth = item
+                retrying = False
+                try:
+                    started = time.monotonic()
+                    try:
+                        result = await async_crawl_site(session, url)
+                        retrying = schedule_retry(result, url, depth)
+                    finally:
+                        frontier.release(url)
+                    if has_content(result):
+                        page = Page(url, result.html, depth, result.status, time.monotonic() - started,
+                                    result.validators, result.outlinks, result.encoding, result.size)
+                        if executor is not None and page.outlinks is None:
+                            [found_urls] = await loop.run_in_executor(executor, extract_links_batch, [(url, page.html, page.encoding)])
+                            record_links(page, found_urls, max_depth)
+                        else:
+                            process_page(page, max_depth)
+                except Exception:
+                    logging.exception(f"Error processing {url}")
+                finally:
+                    if not retrying:
+                        frontier.task_done()
+                    async with work_ready:
+                        if frontier.finished:
+                            work_ready.notify_all()
+                        else:
+                            work_ready.notify(len(frontier))
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+def search_all_urls(start_url, max_depth, mode='threads', concurrency=1000,
+                    host_interval=0.0, host_concurrency=10, visited_store='set',
+                    processors=1, process_mode='threads', batch_size=16,
+                    queue_pages=1000, queue_bytes=64 * 2**20,
+                    previous_votes=None, rank_every=1000, results_path=None,
+                    checkpoint_dir=None, checkpoint_interval=10.0,
+                    frontier_memory=None, frontier_dir=None, fetch_cache_path=None,
+                    max_page_bytes=10 * 2**20, raw_bytes=False, retries=3, retry_delay=5.0,
+                    connect_timeout=10.0, read_timeout=30.0, page_timeout=60.0):
+    """Search all URLs using multithreaded fetchers and `processors` processor threads.
+
+    With mode='async' the fetchers are replaced by `concurrency` coroutines
+    on a single event loop, which extract links as each page arrives.
+    With process_mode='processes' link extraction runs in a pool of
+    `processors` worker processes, fed in batches of `batch_size` pages.
+    Fetchers block while `queue_pages` pages or `queue_bytes` of HTML are
+    waiting to be processed.
+    `host_interval` and `host_concurrency` set the frontier's per-host
+    politeness limits. `visited_store` names an entry of VISITED_STORES or
+    is a ready-made store such as BloomVisited(error_rate=1e-6).
+    With `frontier_memory` at most that many queued URLs are kept in RAM and
+    the rest spill to segment files in `frontier_dir`.
+    `fetch_cache_path` names a SQLite FetchCache that makes recrawls
+    conditional: unchanged pages are not downloaded again or re-parsed.
+    Only HTML responses are downloaded, and only their first
+    `max_page_bytes` bytes. With `raw_bytes` pages are handed to the link
+    extractor undecoded.
+    A URL that fails with a 429, a 5xx or a network error is retried up to
+    `retries` times, after a backoff starting at `retry_delay` seconds.
+    Every request has `connect_timeout` and `read_timeout`, and a page
+    must be downloaded within `page_timeout` seconds.
+    """
+    global result_dict, vote_counts, frontier, visited, html_queue, ranker, rank_interval, result_writer, checkpoint, fetch_cache, page_byte_limit, raw_pages, fetch_timeouts, page_deadline
+    page_byte_limit = max_page_bytes
+    raw_pages = raw_bytes
+    fetch_timeouts = (connect_timeout, read_timeout)
+    page_deadline = page_timeout
+    visited = VISITED_STORES[visited_store]() if isinstance(visited_store, str) else visited_store
+    result_dict = LinkGraph()
     vote_counts = defaultdict(float)
+    ranker = IncrementalRanker(result_dict, previous_votes)
+    rank_interval = rank_every
+    html_queue = PageQueue(queue_pages, queue_bytes)
+    result_writer = ResultWriter(results_path) if results_path else None
+    fetch_cache = FetchCache(fetch_cache_path) if fetch_cache_path else None
 
-    start_urls = [(start_url, 1)]
-    total_urls = len(start_urls)
+    start_url = canonicalize_url(start_url)
+    queued = []
+    checkpoint = None
+    if checkpoint_dir:
+        queued = restore_checkpoint(checkpoint_dir, max_depth) or []
+        checkpoint = Checkpoint(checkpoint_dir, start_url, max_depth, checkpoint_interval)
+    # A log from a crawl that stopped before its seed page was recorded (an
+    # early crash, or a failed seed fetch) holds nothing to resume from.
+    if start_url not in result_dict and all(url != start_url for url, _ in queued):
+        visited.add(start_url)
+        queued.append((start_url, 1))
+    if frontier_memory:
+        frontier = DiskFrontier(queued, host_interval, host_concurrency, frontier_memory, directory=frontier_dir,
+                                retries=retries, retry_delay=retry_delay)
+    else:
+        frontier = Frontier(queued, host_interval, host_concurrency, retries=retries, retry_delay=retry_delay)
+    total_urls = len(frontier)
+
+    executor = None
+    if process_mode == 'processes':
+        # Workers start on the first submit, when fetcher threads are already
+        # running, so they must not be forked from this process. They import
+        # crawler afresh and are given this process's canonicalization rules.
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        executor = ProcessPoolExecutor(processors, mp_context=multiprocessing.get_context(start_method),
+                                       initializer=configure_canonicalization, initargs=canonicalization_rules)
 
     with tqdm(total=total_urls, dynamic_ncols=True, desc="Crawling", unit="URLs") as progress_bar:
-        fetch_threads = []
-        for _ in range(max(1, os.cpu_count() - 2)):
-            thread = Thread(target=fetcher_thread, args=(max_depth, progress_bar))
-            thread.start()
-            fetch_threads.append(thread)
+        if mode == 'async':
+            asyncio.run(async_search(max_depth, progress_bar, concurrency, executor))
+        else:
+            fetch_threads = []
+            for _ in range(max(1, os.cpu_count() - 2)):
+                thread = Thread(target=fetcher_thread, args=(max_depth, progress_bar))
+                thread.start()
+                fetch_threads.append(thread)
+
+            processor_threads = []
+            for _ in range(processors):
+                thread = Thread(target=processor_thread, args=(max_depth, progress_bar, executor, batch_size))
+                thread.start()
+                processor_threads.append(thread)
 
-        processor = Thread(target=processor_thread, args=(max_depth, progress_bar))
-        processor.start()
+            for thread in fetch_threads:
+                thread.join()
+            for _ in processor_threads:
+                html_queue.put(None)
+            for thread in processor_threads:
+                thread.join()
+    close_sessions()
+    if executor is not None:
+        executor.shutdown()
+    if result_writer is not None:
+        result_writer.close()
+    if checkpoint is not None:
+        checkpoint.close()
+    if isinstance(frontier, DiskFrontier):
+        frontier.close()
+    if fetch_cache is not None:
+        fetch_cache.close()
 
-        for thread in fetch_threads:
-            thread.join()
-        processor.join()
+    ranker.update(vote_counts)
 
     return result_dict, vote_counts
 
+def resume_crawl(checkpoint_dir, **options):
+    """Resume the crawl logged in `checkpoint_dir`; takes the same options as search_all_urls."""
+    with open(os.path.join(checkpoint_dir, 'crawl.json')) as meta_file:
+        meta = json.load(meta_file)
+    return search_all_urls(meta['start_url'], meta['max_depth'], checkpoint_dir=checkpoint_dir, **options)
+
 if __name__ == "__main__":
     print('Welcome to the website crawler.')
     website = input('What website would you like to start with: ')
@@ -169,13 +1844,12 @@ if __name__ == "__main__":
     print(f"\nCrawling completed in {end_time - start_time:.2f} seconds.")
 
     output_folder = './crawl_results/'
-    output_crawl_path = 'crawl_paths.json'
+    output_crawl_path = 'crawl_graph.bin'
     output_votes_path = 'vote_counts.json'
 
     os.makedirs(output_folder, exist_ok=True)
 
-    with open(output_folder + output_crawl_path, 'w') as crawl_file:
-        json.dump(crawl_result, crawl_file, indent=4)
+    crawl_result.save(output_folder + output_crawl_path)
 
     with open(output_folder + output_votes_path, 'w') as votes_file:
         json.dump(vote_counts, votes_file, indent=4)
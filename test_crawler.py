@@ -0,0 +1,24 @@
+"""Regression tests for link extraction. Run with `python -m unittest test_crawler`."""
+import unittest
+
+from crawler import extract_links, page_links
+
+BASE_URL = 'https://x.com/a/b.html'
+
+class ExtractLinksTest(unittest.TestCase):
+
+    def test_blank_hrefs_are_skipped(self):
+        html = '<a href=" ">x</a><a href="&#32;">y</a><a href="">z</a><a href="/ok">ok</a>'
+        self.assertEqual(extract_links(html, BASE_URL), ['https://x.com/ok'])
+        self.assertEqual(extract_links(html.encode(), BASE_URL), ['https://x.com/ok'])
+
+    def test_fragment_only_hrefs_are_not_self_links(self):
+        html = '<a href="#top">top</a><a href="#main">main</a><a href="c.html#part">c</a>'
+        self.assertEqual(page_links(html, 'https://a.com/p'), ['https://a.com/c.html'])
+
+    def test_scheme_is_case_insensitive(self):
+        html = '<a href="HTTP://Other.com/x">x</a><a href="Https://other.com/y">y</a>'
+        self.assertEqual(page_links(html, BASE_URL), ['http://other.com/x', 'https://other.com/y'])
+
+if __name__ == "__main__":
+    unittest.main()